@@ -0,0 +1,293 @@
+import bisect
+import calendar
+import csv
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta
+
+from backfill import LOGBOOK_WINDOW, parse_timestamp
+from compaction import COMPACTED_FOLDER, CSV_PATTERN, iter_compacted_rows
+
+# --- CONFIGURATION ---
+ARCHIVE_FOLDER = "glucose_archive"
+DATA_FOLDER = "glucose_data"
+JSON_FILENAME = "libreview_glucose_readings.json"
+JSON_PATIENT = "librelinkup"  # Archive name for the single-account LibrelinkUP export
+
+# Segment layout: 16 byte header followed by fixed-width little-endian records
+MAGIC = b"GLUARC\x00\x01"
+HEADER = struct.Struct("<8sHH4x")
+RECORD = struct.Struct("<qHBx")  # timestamp (epoch seconds), mg/dL, flags
+INDEX_ENTRY = struct.Struct("<qQ")  # timestamp, record number
+INDEX_STRIDE = 256  # One sparse index entry every N records
+
+# Flag bits
+FLAG_HIGH = 0x01
+FLAG_LOW = 0x02
+TYPE_FLAGS = {'historical': 0x00, 'current': 0x04, 'backfill': 0x08}
+
+NUMPY_DTYPE = [('timestamp', '<i8'), ('value_mg_dl', '<u2'), ('flags', 'u1'), ('pad', 'u1')]
+
+
+def to_epoch(value):
+    """Convert a datetime or LibreLinkUp timestamp to epoch seconds (sensor local time)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, datetime):
+        value = parse_timestamp(value)
+        if value is None:
+            return None
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(timestamp):
+    """Convert epoch seconds back to a naive datetime in sensor local time"""
+    return datetime(1970, 1, 1) + timedelta(seconds=timestamp)
+
+
+def make_flags(is_high=False, is_low=False, reading_type='historical'):
+    """Pack reading status into the flags byte"""
+    flags = TYPE_FLAGS.get(reading_type, 0)
+    if _truthy(is_high):
+        flags |= FLAG_HIGH
+    if _truthy(is_low):
+        flags |= FLAG_LOW
+    return flags
+
+
+def _truthy(value):
+    if isinstance(value, str):
+        return value.strip().lower() == 'true'
+    return bool(value)
+
+
+class GlucoseArchive:
+    """Folder of append-only per-patient binary segments"""
+
+    def __init__(self, folder=ARCHIVE_FOLDER):
+        self.folder = folder
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+
+    def segment_path(self, patient):
+        return os.path.join(self.folder, f"{patient}.glu")
+
+    def index_path(self, patient):
+        return os.path.join(self.folder, f"{patient}.idx")
+
+    def patients(self):
+        """List archived patients"""
+        return sorted(name[:-4] for name in os.listdir(self.folder) if name.endswith(".glu"))
+
+    def append(self, patient, records):
+        """Add (timestamp, value, flags) records, skipping timestamps already archived"""
+        new = {}
+        for timestamp, value, flags in records:
+            timestamp = to_epoch(timestamp)
+            if timestamp is None or value in (None, ''):
+                continue
+            new.setdefault(timestamp, (timestamp, int(float(value)), flags))
+        if not new:
+            return 0
+
+        with self.open(patient) as reader:
+            count = len(reader)
+            last = reader.last_timestamp()
+            newer = sorted(ts for ts in new if last is None or ts > last)
+            older = sorted(ts for ts in new if last is not None and ts <= last)
+
+            # Overlapping imports repeat readings we already have; only look at the overlapping range
+            missing = []
+            if older:
+                known = {record[0] for record in reader.records(older[0], last + 1)}
+                missing = [ts for ts in older if ts not in known]
+
+            # Truly missing older readings (e.g. a backfill) require rewriting the segment
+            existing = {record[0]: record for record in reader.records()} if missing else None
+
+        if existing is not None:
+            for ts in missing + newer:
+                existing[ts] = new[ts]
+            self._rewrite(patient, [existing[ts] for ts in sorted(existing)])
+        elif newer:
+            self._append_sorted(patient, [new[ts] for ts in newer], count)
+        return len(missing) + len(newer)
+
+    def _append_sorted(self, patient, records, count):
+        segment_path = self.segment_path(patient)
+        if not os.path.exists(segment_path):
+            with open(segment_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, 1, RECORD.size))
+
+        with open(segment_path, 'ab') as segment, open(self.index_path(patient), 'ab') as index:
+            for i, record in enumerate(records, count):
+                segment.write(RECORD.pack(*record))
+                if i % INDEX_STRIDE == 0:
+                    index.write(INDEX_ENTRY.pack(record[0], i))
+
+    def _rewrite(self, patient, records):
+        segment_path = self.segment_path(patient)
+        index_path = self.index_path(patient)
+        with open(segment_path + ".tmp", 'wb') as segment, open(index_path + ".tmp", 'wb') as index:
+            segment.write(HEADER.pack(MAGIC, 1, RECORD.size))
+            for i, record in enumerate(records):
+                segment.write(RECORD.pack(*record))
+                if i % INDEX_STRIDE == 0:
+                    index.write(INDEX_ENTRY.pack(record[0], i))
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(segment_path + ".tmp", segment_path)
+
+    def open(self, patient):
+        """Open a patient's segment for reading"""
+        return ArchiveReader(self.segment_path(patient), self.index_path(patient))
+
+
+class ArchiveReader:
+    """Memory-mapped view over one patient segment"""
+
+    def __init__(self, segment_path, index_path):
+        self.mm = None
+        self.view = memoryview(b"")
+        self.count = 0
+        self.index_times = []
+        self.index_records = []
+
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) > HEADER.size:
+            with open(segment_path, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, record_size = HEADER.unpack_from(self.mm)
+            if magic != MAGIC or record_size != RECORD.size:
+                self.close()
+                raise ValueError(f"Not a glucose archive segment: {segment_path}")
+            self.count = (len(self.mm) - HEADER.size) // RECORD.size
+            self.view = memoryview(self.mm)[HEADER.size:HEADER.size + self.count * RECORD.size]
+
+            if os.path.exists(index_path):
+                with open(index_path, 'rb') as f:
+                    for timestamp, record_no in INDEX_ENTRY.iter_unpack(f.read()):
+                        if record_no < self.count:
+                            self.index_times.append(timestamp)
+                            self.index_records.append(record_no)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.view.release()
+        if self.mm is not None:
+            try:
+                self.mm.close()
+            except BufferError:
+                # Slices handed out are still alive; the mapping goes away with the last of them
+                pass
+            self.mm = None
+
+    def timestamp_at(self, i):
+        return struct.unpack_from("<q", self.view, i * RECORD.size)[0]
+
+    def last_timestamp(self):
+        return self.timestamp_at(self.count - 1) if self.count else None
+
+    def find(self, timestamp):
+        """Return the first record number with a timestamp >= the given one"""
+        timestamp = to_epoch(timestamp)
+        # Narrow the search to one index block, then bisect inside the mapped block
+        block = bisect.bisect_right(self.index_times, timestamp) - 1
+        lo = self.index_records[block] if block >= 0 else 0
+        hi = self.index_records[block + 1] if block + 1 < len(self.index_records) else self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def slice(self, start=None, end=None):
+        """Zero-copy memoryview over the records in [start, end)"""
+        first = self.find(start) if start is not None else 0
+        last = self.find(end) if end is not None else self.count
+        return self.view[first * RECORD.size:max(first, last) * RECORD.size]
+
+    def records(self, start=None, end=None):
+        """Iterate (timestamp, value, flags) tuples in [start, end)"""
+        return RECORD.iter_unpack(self.slice(start, end))
+
+    def to_numpy(self, start=None, end=None):
+        """Zero-copy NumPy structured array over the records in [start, end)"""
+        import numpy
+        return numpy.frombuffer(self.slice(start, end), dtype=numpy.dtype(NUMPY_DTYPE))
+
+
+def import_csv(archive, patient, filename):
+    """Import a CSV written by PatientManager.save_glucose_data_to_csv"""
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        return import_rows(archive, patient, csv.DictReader(csvfile))
+
+
+def import_rows(archive, patient, rows):
+    """Import rows in the PatientManager CSV layout"""
+    records = [(row.get('timestamp'), row.get('value_mg_dl'),
+                make_flags(row.get('is_high'), row.get('is_low'), row.get('type') or 'historical'))
+               for row in rows]
+    return archive.append(patient, records)
+
+
+def import_json(archive, patient, filename):
+    """Import the readings JSON exported by LibrelinkUP"""
+    with open(filename, 'r') as f:
+        readings = json.load(f)
+    records = [(r.get('timestamp'), r.get('value_mgdl'), make_flags(r.get('is_high'), r.get('is_low')))
+               for r in readings]
+    return archive.append(patient, records)
+
+
+def import_data_folder(archive, data_folder=DATA_FOLDER):
+    """Import every per-run CSV and compacted segment in the data folder, grouped by patient name"""
+    imported = {}
+    compacted_folder = os.path.join(data_folder, COMPACTED_FOLDER)
+    if os.path.isdir(compacted_folder):
+        for patient in sorted(os.listdir(compacted_folder)):
+            if os.path.isdir(os.path.join(compacted_folder, patient)):
+                # Segments ending before what is archived can only gain backfilled readings,
+                # which the logbook limits to its window
+                with archive.open(patient) as reader:
+                    last = reader.last_timestamp()
+                start = from_epoch(last) - LOGBOOK_WINDOW if last is not None else None
+                imported[patient] = import_rows(archive, patient, iter_compacted_rows(data_folder, patient, start))
+
+    for name in sorted(os.listdir(data_folder)):
+        match = CSV_PATTERN.match(name)
+        if match:
+            patient = match.group('name')
+            added = import_csv(archive, patient, os.path.join(data_folder, name))
+            imported[patient] = imported.get(patient, 0) + added
+    return imported
+
+
+def main():
+    archive = GlucoseArchive()
+
+    if os.path.exists(DATA_FOLDER):
+        for patient, added in import_data_folder(archive).items():
+            print(f"✅ {patient}: {added} new reading(s) archived")
+
+    if os.path.exists(JSON_FILENAME):
+        added = import_json(archive, JSON_PATIENT, JSON_FILENAME)
+        print(f"✅ {JSON_PATIENT}: {added} new reading(s) archived from {JSON_FILENAME}")
+
+    for patient in archive.patients():
+        with archive.open(patient) as reader:
+            print(f"📦 {patient}: {len(reader)} reading(s) in {archive.segment_path(patient)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+# LibreLinkUp reports timestamps as "M/D/YYYY h:mm:ss AM/PM"
+TIMESTAMP_FORMATS = ["%m/%d/%Y %I:%M:%S %p", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]
+MAX_READING_INTERVAL = timedelta(minutes=30)  # Readings normally arrive every 5-15 minutes
+LOGBOOK_WINDOW = timedelta(days=14)  # The logbook reaches back no further, so older gaps cannot be filled
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 2.0
+
+
+def parse_timestamp(value):
+    """Parse a LibreLinkUp timestamp, returning None if it is not recognised"""
+    if not value:
+        return None
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def find_gaps(timestamps, max_interval=MAX_READING_INTERVAL):
+    """Return (start, end) pairs where consecutive readings are further apart than max_interval"""
+    ordered = sorted(set(ts for ts in timestamps if ts is not None))
+    gaps = []
+    for previous, current in zip(ordered, ordered[1:]):
+        if current - previous > max_interval:
+            gaps.append((previous, current))
+    return gaps
+
+
+def readings_in_gaps(readings, gaps, known_timestamps=()):
+    """Keep readings that fall inside a gap and are not already stored"""
+    known = set(known_timestamps)
+    selected = {}
+    for reading in readings:
+        ts = parse_timestamp(reading.get('Timestamp'))
+        if ts is None or ts in known or ts in selected:
+            continue
+        if any(start < ts < end for start, end in gaps):
+            selected[ts] = reading
+    return [selected[ts] for ts in sorted(selected)]
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing out HTTP requests to at most `rate` per second"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        """Block until the next call is allowed"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def backfill_patient(api, patient_manager, patient_id, max_interval=MAX_READING_INTERVAL):
+    """Detect gaps in a patient's stored series and fill them from the logbook"""
+    patient = patient_manager.get_patients()[patient_id]
+    series = patient_manager.load_glucose_series(patient_id, since=datetime.now() - LOGBOOK_WINDOW)
+    gaps = find_gaps(series, max_interval)
+    if not gaps:
+        return True, {'gaps': 0, 'added': 0, 'file': None}
+
+    success, logbook = api.get_logbook_data(patient['email'], patient['password'])
+    if not success:
+        return False, logbook
+
+    readings = readings_in_gaps(logbook, gaps, series)
+    filename = None
+    if readings:
+        filename = patient_manager.save_readings_to_csv(patient_id, readings, reading_type='backfill')
+    return True, {'gaps': len(gaps), 'added': len(readings), 'file': filename}
+
+
+def _limited_api(api_factory, rate_limiter):
+    """Create an API client whose every HTTP call goes through the shared limiter"""
+    api = api_factory()
+    api.rate_limiter = rate_limiter
+    return api
+
+
+def backfill_all_patients(api_factory, patient_manager, patient_ids=None, max_workers=MAX_WORKERS,
+                          rate_limiter=None, on_result=None):
+    """Backfill gaps for many patients in parallel, returning {patient_id: (success, result)}"""
+    # Imported here because it costs more than the rest of the module and only this function needs it
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    if patient_ids is None:
+        patient_ids = list(patient_manager.get_patients())
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(backfill_patient, _limited_api(api_factory, rate_limiter), patient_manager,
+                            patient_id): patient_id
+            for patient_id in patient_ids
+        }
+        for future in as_completed(futures):
+            patient_id = futures[future]
+            try:
+                results[patient_id] = future.result()
+            except Exception as e:
+                results[patient_id] = (False, str(e))
+            if on_result:
+                on_result(patient_id, *results[patient_id])
+    return results
@@ -0,0 +1,90 @@
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# --- CONFIGURATION ---
+RUNS = 20
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_SCRIPTS = ["MultiPatientInterface", "LibrelinkUP"]  # Taken from the first commit
+
+# Load an extensionless script by path, exactly as the headless code paths do
+LOAD_SCRIPT = """
+import importlib.machinery, importlib.util, sys
+def load(path):
+    name = path.rsplit('/', 1)[-1]
+    loader = importlib.machinery.SourceFileLoader(name, path)
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader(name, loader))
+    loader.exec_module(module)
+    return module
+"""
+
+# (label, code) run in a fresh interpreter from this folder; {old} is the folder holding the baseline scripts.
+# Each "now" scenario follows what the subcommand does up to its first request, including the modules
+# loaded lazily on the way: every command that talks to LibreView loads requests on its first request.
+SCENARIOS = [
+    ("bare interpreter", "pass"),
+    ("before: MultiPatientInterface", LOAD_SCRIPT + "load('{old}/MultiPatientInterface').PatientManager"),
+    ("before: LibrelinkUP", LOAD_SCRIPT + "load('{old}/LibrelinkUP').LibreViewAPI"),
+    ("now: cli.py fetch / poll", "import cli; cli.load_script('LibrelinkUP'); import requests"),
+    ("now: cli.py poll --cohort",
+     "import cli, collector; collector.load_script('MultiPatientInterface'); import requests"),
+    ("now: cli.py backfill",
+     "import cli, backfill; cli.load_script('MultiPatientInterface'); "
+     "import concurrent.futures, compaction, requests"),
+    ("now: cli.py export --compact", "import cli, compaction, archive"),
+    ("now: cli.py gui (window open, no fetch yet)",
+     "from common import load_script; load_script('MultiPatientInterface').load_tkinter()"),
+]
+
+
+def extract_baseline(folder):
+    """Write the scripts as they were in the first commit into folder"""
+    root = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=HERE,
+                          capture_output=True, text=True, check=True).stdout.split()[-1]
+    for name in BASELINE_SCRIPTS:
+        source = subprocess.run(["git", "show", f"{root}:{name}"], cwd=HERE,
+                                capture_output=True, check=True).stdout
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(source)
+    return root
+
+
+def time_code(code, runs=RUNS):
+    """Median wall time in milliseconds of a fresh interpreter running code, or (None, error)"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=HERE,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        timings.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return None, lines[-1] if lines else f"exit code {result.returncode}"
+    return statistics.median(timings), None
+
+
+def main():
+    old_folder = tempfile.mkdtemp(prefix="bench_baseline_")
+    try:
+        root = extract_baseline(old_folder)
+        print(f"Cold-start time, median of {RUNS} runs (before = commit {root[:7]})")
+        print("=" * 72)
+        bare = None
+        for label, code in SCENARIOS:
+            median, error = time_code(code.format(old=old_folder))
+            if error:
+                print(f"{label:<48} ❌ {error}")
+                continue
+            if bare is None:
+                bare = median
+            print(f"{label:<48} {median:8.1f} ms  (+{median - bare:6.1f} ms imports)")
+    finally:
+        shutil.rmtree(old_folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import os
+import sys
+
+from common import CONFIG_ENV, load_script
+
+# Every subsystem is imported inside its subcommand so that a cron or container
+# run only pays for what it uses (no tkinter, requests or sqlite for `export`).
+
+
+def cmd_fetch(args):
+    """Fetch the latest readings once and export them"""
+    librelinkup = load_script("LibrelinkUP")
+    client, patient_id = librelinkup.connect()
+    if not client:
+        return 1
+    print(f"✅ {client.stored_count} reading(s) stored for patient {patient_id}")
+    return 0
+
+
+def cmd_poll(args):
+    """Poll continuously, either one account or a share of the patient cohort"""
+    if args.cohort:
+        import collector
+        if not collector.main(args.interval or collector.POLL_INTERVAL_SECONDS):
+            return 1
+    else:
+        librelinkup = load_script("LibrelinkUP")
+        librelinkup.POLL_INTERVAL_SECONDS = args.interval or librelinkup.POLL_INTERVAL_SECONDS
+        librelinkup.main()
+    return 0
+
+
+def cmd_backfill(args):
+    """Detect and backfill gaps for every patient in patients.json"""
+    from backfill import backfill_all_patients
+    interface = load_script("MultiPatientInterface")
+
+    def on_result(patient_id, success, result):
+        if success:
+            print(f"✅ {patient_id}: {result['gaps']} gap(s), {result['added']} reading(s) added")
+        else:
+            print(f"❌ {patient_id}: {result if result else 'Unknown error'}")
+
+    results = backfill_all_patients(interface.LibreViewAPI, interface.PatientManager(),
+                                    max_workers=args.workers, on_result=on_result)
+    return 0 if all(success for success, result in results.values()) else 1
+
+
+def cmd_export(args):
+    """Compact per-run CSVs and import everything into the binary archive"""
+    if args.compact:
+        import compaction
+        compaction.main()
+    import archive
+    archive.main()
+    return 0
+
+
+def cmd_gui(args):
+    """Open the multi-patient desktop interface"""
+    load_script("MultiPatientInterface").main()
+    return 0
+
+
+def cmd_soak(args):
+    """Simulate days of polling against a local fake server"""
+    import soak_test
+    passed, report = soak_test.run_soak(args.patients, args.days, args.step_minutes, bool(args.profile))
+    for line in report:
+        print(line)
+    return 0 if passed else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless LibreView glucose data tools")
+    parser.add_argument("--config", help="Path to a JSON config file with email and password")
+    parser.add_argument("--profile", action="store_true", help="Write periodic CPU, stack and memory reports")
+    parser.add_argument("--profile-folder", help="Folder for profiling reports (default: profiles)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch = subparsers.add_parser("fetch", help=cmd_fetch.__doc__)
+    fetch.set_defaults(func=cmd_fetch)
+
+    poll = subparsers.add_parser("poll", help=cmd_poll.__doc__)
+    poll.add_argument("--cohort", action="store_true", help="Run as a leased collector over patients.json")
+    poll.add_argument("--interval", type=int, help="Seconds between polls")
+    poll.set_defaults(func=cmd_poll)
+
+    backfill = subparsers.add_parser("backfill", help=cmd_backfill.__doc__)
+    backfill.add_argument("--workers", type=int, default=4, help="Patients fetched in parallel")
+    backfill.set_defaults(func=cmd_backfill)
+
+    export = subparsers.add_parser("export", help=cmd_export.__doc__)
+    export.add_argument("--compact", action="store_true", help="Compact glucose_data/ before archiving")
+    export.set_defaults(func=cmd_export)
+
+    gui = subparsers.add_parser("gui", help=cmd_gui.__doc__)
+    gui.set_defaults(func=cmd_gui)
+
+    soak = subparsers.add_parser("soak", help=cmd_soak.__doc__)
+    soak.add_argument("--patients", type=int, default=20, help="Simulated patients")
+    soak.add_argument("--days", type=int, default=3, help="Simulated days of polling")
+    soak.add_argument("--step-minutes", type=int, default=15, help="Simulated minutes between polls")
+    soak.set_defaults(func=cmd_soak)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.config:
+        os.environ[CONFIG_ENV] = args.config
+    if args.profile:
+        from profiling import PROFILE_ENV
+        os.environ[PROFILE_ENV] = args.profile_folder or "1"
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import os
+import socket
+import time
+
+from common import load_script
+from compaction import start_background_compaction
+from leases import LEASE_SECONDS, LeaseStore
+from profiling import profiler_from_env
+
+# --- CONFIGURATION ---
+POLL_INTERVAL_SECONDS = 60  # Must stay below leases.LEASE_SECONDS
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+
+class CollectorWorker:
+    """Polls the share of patients leased to this worker"""
+
+    def __init__(self, patient_manager, api_factory, lease_store, worker_id=WORKER_ID):
+        self.patient_manager = patient_manager
+        self.api_factory = api_factory
+        self.lease_store = lease_store
+        self.worker_id = worker_id
+
+    def poll_once(self):
+        """Rebalance leases and poll every owned patient once"""
+        # Pick up patients added or removed by other processes
+        self.patient_manager.patients = self.patient_manager.load_patients()
+        patients = self.patient_manager.get_patients()
+        owned = self.lease_store.acquire(self.worker_id, list(patients))
+        print(f"👷 {self.worker_id}: {len(owned)}/{len(patients)} patient(s) leased")
+
+        successful = 0
+        for patient_id in owned:
+            # Skip patients whose lease moved to another worker mid-cycle
+            if not self.lease_store.renew(self.worker_id, patient_id):
+                continue
+
+            patient_data = patients[patient_id]
+            try:
+                api = self.api_factory()
+                success, data = api.get_sensor_data(patient_data['email'], patient_data['password'])
+
+                if success:
+                    csv_file = self.patient_manager.save_glucose_data_to_csv(patient_id, data)
+                    print(f"✅ {patient_data['name']}: Data saved to {csv_file}")
+                    successful += 1
+                else:
+                    print(f"❌ {patient_data['name']}: {data if data else 'Unknown error'}")
+
+            except Exception as e:
+                print(f"❌ {patient_data['name']}: {str(e)}")
+
+        return successful
+
+    def run(self, poll_interval=POLL_INTERVAL_SECONDS):
+        """Poll until interrupted, then hand the leases back"""
+        profiler = profiler_from_env()
+        try:
+            while True:
+                started = time.monotonic()
+                self.poll_once()
+                if profiler:
+                    profiler.maybe_report()
+                time.sleep(max(poll_interval - (time.monotonic() - started), 0))
+        except KeyboardInterrupt:
+            print(f"\n🛑 Collector {self.worker_id} stopped by user.")
+        finally:
+            self.lease_store.release_all(self.worker_id)
+            if profiler:
+                profiler.stop()
+
+
+def main(poll_interval=POLL_INTERVAL_SECONDS):
+    # A worker idle for longer than a lease is taken for dead and loses its patients every cycle
+    if poll_interval >= LEASE_SECONDS:
+        print(f"❌ Poll interval ({poll_interval}s) must be shorter than the lease ({LEASE_SECONDS}s).")
+        return False
+
+    interface = load_script("MultiPatientInterface")
+    worker = CollectorWorker(interface.PatientManager(), interface.LibreViewAPI,
+                             LeaseStore())
+    print(f"⏳ Collector {worker.worker_id} started (Ctrl+C to stop)")
+
+    # Compact old per-run CSVs alongside collection; the lock keeps it to one worker at a time
+    stop_compaction = start_background_compaction(worker.patient_manager.data_folder)
+    try:
+        worker.run(poll_interval)
+    finally:
+        stop_compaction.set()
+    return True
+
+
+if __name__ == "__main__":
+    main()
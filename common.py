@@ -0,0 +1,47 @@
+import importlib.machinery
+import importlib.util
+import json
+import os
+import sys
+
+# --- CONFIGURATION ---
+CONFIG_FILENAME = "libreview_config.json"
+CONFIG_ENV = "LIBREVIEW_CONFIG"
+EMAIL_ENV = "LIBREVIEW_EMAIL"
+PASSWORD_ENV = "LIBREVIEW_PASSWORD"
+
+MISSING_CREDENTIALS = (f"❌ No credentials found. Set {EMAIL_ENV} and {PASSWORD_ENV} "
+                       f"or add \"email\" and \"password\" to {CONFIG_FILENAME}.")
+
+
+def load_config(path=None):
+    """Load the JSON config file, returning {} if there is none"""
+    path = path or os.environ.get(CONFIG_ENV, CONFIG_FILENAME)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def load_credentials(path=None):
+    """Get (email, password) from the environment, falling back to the config file"""
+    config = load_config(path)
+    email = os.environ.get(EMAIL_ENV) or config.get("email")
+    password = os.environ.get(PASSWORD_ENV) or config.get("password")
+    return email, password
+
+
+def load_script(name):
+    """Import one of the extensionless scripts in this folder as a module"""
+    if name in sys.modules:
+        return sys.modules[name]
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    loader = importlib.machinery.SourceFileLoader(name, path)
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
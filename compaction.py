@@ -0,0 +1,254 @@
+import csv
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from backfill import parse_timestamp
+
+# --- CONFIGURATION ---
+DATA_FOLDER = "glucose_data"
+COMPACTED_FOLDER = "compacted"  # Inside the data folder
+QUARANTINE_FOLDER = "quarantine"  # Inside the data folder, for CSVs that could not be fully compacted
+MANIFEST_FILENAME = "manifest.json"
+LOCK_FILENAME = "compaction.lock"
+COMPACTION_INTERVAL_SECONDS = 15 * 60
+MIN_FILE_AGE_SECONDS = 120  # Leave files that may still be being written alone
+STALE_LOCK_SECONDS = 60 * 60
+PERIOD = "day"  # "day" or "week"
+
+CSV_PATTERN = re.compile(r"^(?P<name>.+)_\d{8}_\d{6}(_\w+)?\.csv$")
+FIELDNAMES = ['timestamp', 'value_mg_dl', 'trend_message', 'is_high', 'is_low', 'type']
+
+
+def period_key(ts, period=PERIOD):
+    """Segment key for a reading time"""
+    if period == "week":
+        return ts.strftime("%G-W%V")
+    return ts.strftime("%Y-%m-%d")
+
+
+def merge_row(rows, ts, row):
+    """Add a row keyed by time, preferring rows that carry a trend message"""
+    existing = rows.get(ts)
+    if existing is None or (row.get('trend_message') and not existing.get('trend_message')):
+        rows[ts] = row
+
+
+def read_segment(filename):
+    """Read the rows of a compressed segment"""
+    with gzip.open(filename, 'rt', newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def load_manifest(compacted_folder):
+    """Load the {patient_name: {segment key: entry}} manifest of a compacted folder"""
+    manifest_file = os.path.join(compacted_folder, MANIFEST_FILENAME)
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def segment_in_range(entry, start=None, end=None):
+    """Check whether a manifest entry may hold readings in [start, end)"""
+    try:
+        if start is not None and datetime.fromisoformat(entry['last']) < start:
+            return False
+        if end is not None and datetime.fromisoformat(entry['first']) >= end:
+            return False
+    except (KeyError, TypeError, ValueError):
+        pass
+    return True
+
+
+def iter_compacted_rows(data_folder, patient_name, start=None, end=None):
+    """Yield the rows of a patient's compacted segments that cover [start, end)"""
+    patient_folder = os.path.join(data_folder, COMPACTED_FOLDER, patient_name)
+    if not os.path.isdir(patient_folder):
+        return
+    # Segments the manifest places outside the range are never decompressed; rows of the
+    # segments read are yielded as they are, so callers still filter by time
+    segments = load_manifest(os.path.join(data_folder, COMPACTED_FOLDER)).get(patient_name, {})
+    for name in sorted(os.listdir(patient_folder)):
+        if name.endswith(".csv.gz") and segment_in_range(segments.get(name[:-7], {}), start, end):
+            yield from read_segment(os.path.join(patient_folder, name))
+
+
+class Compactor:
+    """Merges per-run CSVs into deduplicated, compressed per-patient segments"""
+
+    def __init__(self, data_folder=DATA_FOLDER, period=PERIOD, min_file_age=MIN_FILE_AGE_SECONDS):
+        self.data_folder = data_folder
+        self.period = period
+        self.min_file_age = min_file_age
+        self.compacted_folder = os.path.join(data_folder, COMPACTED_FOLDER)
+        self.quarantine_folder = os.path.join(data_folder, QUARANTINE_FOLDER)
+        self.manifest_file = os.path.join(self.compacted_folder, MANIFEST_FILENAME)
+        self.lock_file = os.path.join(self.compacted_folder, LOCK_FILENAME)
+
+    def load_manifest(self):
+        """Load the segment manifest"""
+        return load_manifest(self.compacted_folder)
+
+    def save_manifest(self, manifest):
+        """Save the segment manifest"""
+        temp_file = f"{self.manifest_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(temp_file, self.manifest_file)
+
+    def pending_files(self):
+        """Group per-run CSVs that are old enough to compact by patient name"""
+        now = time.time()
+        pending = defaultdict(list)
+        for name in sorted(os.listdir(self.data_folder)):
+            match = CSV_PATTERN.match(name)
+            path = os.path.join(self.data_folder, name)
+            if match and now - os.path.getmtime(path) >= self.min_file_age:
+                pending[match.group('name')].append(path)
+        return pending
+
+    def compact_once(self):
+        """Compact all pending files, returning {patient_name: files compacted}"""
+        if not os.path.exists(self.compacted_folder):
+            os.makedirs(self.compacted_folder)
+        if not self._acquire_lock():
+            return {}
+
+        try:
+            manifest = self.load_manifest()
+            compacted = {}
+            for patient_name, files in self.pending_files().items():
+                merged_files, kept_files = self._compact_patient(manifest, patient_name, files)
+                # Only remove sources once their segments and the manifest are on disk
+                self.save_manifest(manifest)
+                for path in merged_files:
+                    os.remove(path)
+                # Set kept files aside so later passes do not re-read them and rewrite their segments
+                for path in kept_files:
+                    self._quarantine(path)
+                compacted[patient_name] = len(merged_files)
+            return compacted
+        finally:
+            os.remove(self.lock_file)
+
+    def _quarantine(self, path):
+        """Move a source CSV that could not be fully compacted out of the data folder"""
+        if not os.path.exists(self.quarantine_folder):
+            os.makedirs(self.quarantine_folder)
+        target = os.path.join(self.quarantine_folder, os.path.basename(path))
+        try:
+            os.replace(path, target)
+            print(f"⚠️ {path}: moved to {target} for manual review")
+        except OSError as e:
+            print(f"⚠️ {path}: could not be moved to {self.quarantine_folder} ({str(e)})")
+
+    def _compact_patient(self, manifest, patient_name, files):
+        """Merge files into segments, returning (files merged completely, files to keep)"""
+        by_period = defaultdict(dict)
+        merged_files = []
+        kept_files = []
+        for path in files:
+            unparsed = 0
+            try:
+                with open(path, 'r', newline='', encoding='utf-8') as csvfile:
+                    for row in csv.DictReader(csvfile):
+                        ts = parse_timestamp(row.get('timestamp'))
+                        if ts is None:
+                            unparsed += 1
+                        else:
+                            merge_row(by_period[period_key(ts, self.period)], ts, row)
+            except (OSError, csv.Error, UnicodeDecodeError) as e:
+                print(f"⚠️ {path}: could not be read ({str(e)}), keeping it")
+                kept_files.append(path)
+                continue
+
+            # Keep files with rows we could not place so no reading is lost
+            if unparsed:
+                print(f"⚠️ {path}: {unparsed} row(s) with unrecognised timestamps, keeping it")
+                kept_files.append(path)
+            else:
+                merged_files.append(path)
+
+        patient_folder = os.path.join(self.compacted_folder, patient_name)
+        if not os.path.exists(patient_folder):
+            os.makedirs(patient_folder)
+        patient_manifest = manifest.setdefault(patient_name, {})
+
+        for key, rows in by_period.items():
+            segment = os.path.join(patient_folder, f"{key}.csv.gz")
+            if os.path.exists(segment):
+                for row in read_segment(segment):
+                    ts = parse_timestamp(row.get('timestamp'))
+                    if ts is not None:
+                        merge_row(rows, ts, row)
+
+            ordered = sorted(rows)
+            temp_file = f"{segment}.tmp"
+            with gzip.open(temp_file, 'wt', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
+                writer.writeheader()
+                for ts in ordered:
+                    writer.writerow(rows[ts])
+            os.replace(temp_file, segment)
+
+            patient_manifest[key] = {
+                'file': os.path.relpath(segment, self.compacted_folder),
+                'readings': len(ordered),
+                'first': ordered[0].isoformat(),
+                'last': ordered[-1].isoformat()
+            }
+
+        return merged_files, kept_files
+
+    def _acquire_lock(self):
+        """Take the compaction lock so only one process compacts at a time"""
+        try:
+            if time.time() - os.path.getmtime(self.lock_file) > STALE_LOCK_SECONDS:
+                os.remove(self.lock_file)
+        except OSError:
+            pass
+        try:
+            os.close(os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def run(self, stop_event, interval=COMPACTION_INTERVAL_SECONDS):
+        """Compact periodically until stop_event is set"""
+        while not stop_event.is_set():
+            try:
+                for patient_name, count in self.compact_once().items():
+                    print(f"🗜 {patient_name}: compacted {count} file(s)")
+            except Exception as e:
+                print(f"❌ Compaction error: {str(e)}")
+            stop_event.wait(interval)
+
+
+def start_background_compaction(data_folder=DATA_FOLDER, interval=COMPACTION_INTERVAL_SECONDS):
+    """Run compaction in a daemon thread, returning the event that stops it"""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=Compactor(data_folder).run, args=(stop_event, interval))
+    thread.daemon = True
+    thread.start()
+    return stop_event
+
+
+def main():
+    compacted = Compactor().compact_once()
+    if not compacted:
+        print("✅ Nothing to compact.")
+    for patient_name, count in compacted.items():
+        print(f"🗜 {patient_name}: compacted {count} file(s)")
+
+
+if __name__ == "__main__":
+    main()
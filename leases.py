@@ -0,0 +1,107 @@
+import math
+import sqlite3
+import time
+
+LEASE_FILENAME = "collector_leases.db"
+LEASE_SECONDS = 180  # A worker that misses heartbeats for this long is considered dead
+
+
+class LeaseStore:
+    """Shared SQLite store that splits patients between collector workers"""
+
+    def __init__(self, path=LEASE_FILENAME, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS workers ("
+                         "worker_id TEXT PRIMARY KEY, heartbeat REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases ("
+                         "patient_id TEXT PRIMARY KEY, worker_id TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _Transaction(conn)
+
+    def acquire(self, worker_id, patient_ids):
+        """Heartbeat, rebalance and return the patient IDs this worker now owns"""
+        patient_ids = sorted(set(patient_ids))
+        now = time.time()
+        expires = now + self.lease_seconds
+
+        with self._connect() as conn:
+            # Register ourselves and forget workers that stopped heartbeating
+            conn.execute("INSERT OR REPLACE INTO workers VALUES (?, ?)", (worker_id, now))
+            conn.execute("DELETE FROM workers WHERE heartbeat < ?", (now - self.lease_seconds,))
+
+            # Leases are freed when their holder dies, not when a row expires: a live worker
+            # renews one patient at a time and may not reach the last one within a lease
+            conn.execute("DELETE FROM leases WHERE worker_id NOT IN (SELECT worker_id FROM workers)")
+
+            # An empty list usually means patients.json could not be read; keep every lease as it is
+            if not patient_ids:
+                return []
+
+            # Only drop our own leases on removed patients, so a stale list cannot evict other workers
+            leases = dict(conn.execute("SELECT patient_id, worker_id FROM leases").fetchall())
+            for patient_id in set(leases) - set(patient_ids):
+                if leases[patient_id] == worker_id:
+                    conn.execute("DELETE FROM leases WHERE patient_id = ?", (patient_id,))
+                    del leases[patient_id]
+
+            live_workers = conn.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+            target = math.ceil(len(patient_ids) / live_workers)
+
+            # Give back our surplus so newly joined workers can pick it up
+            owned = sorted(p for p, w in leases.items() if w == worker_id)
+            for patient_id in owned[target:]:
+                conn.execute("DELETE FROM leases WHERE patient_id = ?", (patient_id,))
+            owned = owned[:target]
+
+            # Claim unowned patients up to our fair share
+            free = [p for p in patient_ids if p not in leases]
+            owned += free[:max(target - len(owned), 0)]
+
+            for patient_id in owned:
+                conn.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (patient_id, worker_id, expires))
+
+        return owned
+
+    def renew(self, worker_id, patient_id):
+        """Extend a lease, returning False if the worker no longer holds it"""
+        now = time.time()
+        with self._connect() as conn:
+            # Another worker only takes a patient over once we gave it back or stopped heartbeating,
+            # so a row that still names us is ours even if it expired during a long cycle
+            cursor = conn.execute("UPDATE leases SET expires = ? WHERE patient_id = ? AND worker_id = ?",
+                                  (now + self.lease_seconds, patient_id, worker_id))
+            conn.execute("UPDATE workers SET heartbeat = ? WHERE worker_id = ?", (now, worker_id))
+            return cursor.rowcount == 1
+
+    def release_all(self, worker_id):
+        """Drop all leases of a worker that is shutting down"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE worker_id = ?", (worker_id,))
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def get_assignments(self):
+        """Get the current {patient_id: worker_id} assignment"""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT patient_id, worker_id FROM leases").fetchall())
+
+
+class _Transaction:
+    """Run a block of statements as one exclusive SQLite transaction"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
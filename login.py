@@ -2,6 +2,8 @@ import requests
 import json
 from datetime import datetime
 
+from common import MISSING_CREDENTIALS, load_credentials
+
 
 class LibreViewAPI:
     def __init__(self):
@@ -309,9 +311,11 @@ class LibreViewAPI:
 
 
 def main():
-    # Your credentials
-    EMAIL = "ranaweeranuwantha@gmail.com"
-    PASSWORD = "Sam1sung$#@!"
+    # Your credentials (from LIBREVIEW_EMAIL / LIBREVIEW_PASSWORD or libreview_config.json)
+    EMAIL, PASSWORD = load_credentials()
+    if not EMAIL or not PASSWORD:
+        print(MISSING_CREDENTIALS)
+        return
 
     # Create API instance
     api = LibreViewAPI()
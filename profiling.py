@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# cProfile, pstats and tracemalloc are imported only once profiling starts, so the
+# scripts can check profiler_from_env() without paying for them on every run.
+
+# --- CONFIGURATION ---
+PROFILE_ENV = "LIBREVIEW_PROFILE"  # Set to a folder name (or "1") to enable profiling
+PROFILE_FOLDER = "profiles"
+REPORT_INTERVAL_SECONDS = 15 * 60
+SAMPLE_INTERVAL_SECONDS = 0.01
+TRACEMALLOC_FRAMES = 25
+TOP_ENTRIES = 40
+
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        # No /proc (macOS): fall back to the peak, which ru_maxrss reports in bytes there
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StackSampler:
+    """Background thread that counts the stacks of all other threads"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL_SECONDS):
+        from collections import Counter
+        self.interval = interval
+        self.stacks = Counter()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="stack-sampler")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                with self.lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def take(self):
+        """Return and reset the collapsed stack counts"""
+        from collections import Counter
+        with self.lock:
+            stacks, self.stacks = self.stacks, Counter()
+        return stacks
+
+
+class Profiler:
+    """Periodically writes cProfile, sampled stack and tracemalloc reports"""
+
+    def __init__(self, folder=PROFILE_FOLDER, interval=REPORT_INTERVAL_SECONDS,
+                 sample_interval=SAMPLE_INTERVAL_SECONDS):
+        # One subfolder per run so restarts and parallel collectors never overwrite each other
+        self.folder = os.path.join(folder, f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}")
+        self.interval = interval
+        self.sampler = StackSampler(sample_interval)
+        self.cpu = None
+        self.first_snapshot = None
+        self.previous_snapshot = None
+        self.started = None
+        self.last_report = None
+        self.report_count = 0
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+
+    def start(self):
+        """Start profiling the calling thread and sampling all threads"""
+        import cProfile
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.first_snapshot = self.previous_snapshot = tracemalloc.take_snapshot()
+        self.cpu = cProfile.Profile()
+        self.cpu.enable()
+        self.sampler.start()
+        self.started = self.last_report = time.monotonic()
+        print(f"🔬 Profiling enabled, reports every {self.interval}s in {self.folder}/")
+
+    def maybe_report(self):
+        """Write a report if the report interval has elapsed"""
+        if self.started is not None and time.monotonic() - self.last_report >= self.interval:
+            self.report()
+
+    def report(self):
+        """Write one numbered set of reports and reset the CPU counters"""
+        import cProfile
+        import io
+        import pstats
+        import tracemalloc
+
+        self.report_count += 1
+        self.last_report = time.monotonic()
+        prefix = os.path.join(self.folder, f"{self.report_count:04d}")
+
+        # cProfile: functions of the profiled thread by cumulative time
+        self.cpu.disable()
+        stream = io.StringIO()
+        pstats.Stats(self.cpu, stream=stream).sort_stats("cumulative").print_stats(TOP_ENTRIES)
+        with open(f"{prefix}_cpu.txt", "w") as f:
+            f.write(stream.getvalue())
+        self.cpu = cProfile.Profile()
+        self.cpu.enable()
+
+        # Sampled stacks of every thread in collapsed (flame graph) format
+        with open(f"{prefix}_stacks.txt", "w") as f:
+            for stack, count in self.sampler.take().most_common():
+                f.write(f"{stack} {count}\n")
+
+        # tracemalloc: growth since the previous report and since start
+        # (the profiler's own bookkeeping is filtered out so it does not hide real growth)
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+        with open(f"{prefix}_memory.txt", "w") as f:
+            f.write("# Since previous report\n")
+            for stat in snapshot.compare_to(self.previous_snapshot, "lineno")[:TOP_ENTRIES]:
+                f.write(f"{stat}\n")
+            f.write("\n# Since start\n")
+            for stat in snapshot.compare_to(self.first_snapshot, "lineno")[:TOP_ENTRIES]:
+                f.write(f"{stat}\n")
+        self.previous_snapshot = snapshot
+
+        traced, peak = tracemalloc.get_traced_memory()
+        summary_file = os.path.join(self.folder, "summary.csv")
+        write_header = not os.path.exists(summary_file)
+        with open(summary_file, "a") as f:
+            if write_header:
+                f.write("report,time,elapsed_seconds,rss_bytes,traced_bytes,traced_peak_bytes\n")
+            f.write(f"{self.report_count},{datetime.now().isoformat()},"
+                    f"{self.last_report - self.started:.1f},{current_rss()},{traced},{peak}\n")
+
+    def stop(self):
+        """Write a final report and stop profiling"""
+        if self.started is None:
+            return
+        import tracemalloc
+        self.report()
+        self.cpu.disable()
+        self.sampler.stop()
+        tracemalloc.stop()
+        self.started = None
+
+
+def profiler_from_env():
+    """Create and start a Profiler if LIBREVIEW_PROFILE is set, else return None"""
+    setting = os.environ.get(PROFILE_ENV)
+    if not setting or setting == "0":
+        return None
+    profiler = Profiler(PROFILE_FOLDER if setting == "1" else setting)
+    profiler.start()
+    return profiler
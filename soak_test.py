@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from collector import CollectorWorker
+from common import load_script
+from compaction import Compactor
+from leases import LeaseStore
+from profiling import Profiler, current_rss
+
+# --- CONFIGURATION ---
+PATIENTS = 20
+DAYS = 3
+STEP_MINUTES = 15  # Simulated time between polls
+GRAPH_HOURS = 12
+LOGBOOK_HOURS = 24
+OUTAGE_HOURS = 16  # One simulated outage per day, longer than the graph window so recovery needs the logbook
+WARMUP_FRACTION = 0.1  # Ignore the first cycles while caches and imports settle
+LATENCY_GROWTH_TOLERANCE = 0.5  # Fail if late polls are 50% slower than early ones
+RSS_GROWTH_LIMIT_MB = 25
+TIMESTAMP_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+
+class FakeLibreViewServer:
+    """Local LibreLinkUp stand-in whose readings follow a simulated clock"""
+
+    def __init__(self, start=datetime(2024, 1, 1)):
+        self.clock = start
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reading(self, patient_id, ts):
+        """Deterministic glucose curve per patient"""
+        phase = zlib.crc32(patient_id.encode("utf-8")) % 360
+        value = int(120 + 50 * math.sin(math.radians(phase + ts.timestamp() / 240)))
+        return {
+            'Timestamp': ts.strftime(TIMESTAMP_FORMAT),
+            'ValueInMgPerDl': value,
+            'TrendMessage': None,
+            'isHigh': value > 180,
+            'isLow': value < 70
+        }
+
+    def graph(self, patient_id):
+        now = self.clock
+        graph_data = [self.reading(patient_id, now - timedelta(minutes=15 * k))
+                      for k in range(GRAPH_HOURS * 4, 0, -1)]
+        measurement = dict(self.reading(patient_id, now), TrendMessage="Stable")
+        return {"connection": {"patientId": patient_id, "glucoseMeasurement": measurement},
+                "graphData": graph_data}
+
+    def logbook(self, patient_id):
+        now = self.clock
+        return [self.reading(patient_id, now - timedelta(minutes=15 * k)) for k in range(LOGBOOK_HOURS * 4, 0, -1)]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _patient_id(self):
+                token = self.headers.get("Authorization", "").replace("Bearer ", "")
+                return f"fake-{zlib.crc32(token.encode('utf-8')):08x}"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                email = body.get("email", "")
+                self._send({"status": 0, "ticket": {"token": email},
+                            "data": {"authTicket": {"token": email}, "user": {"id": email}}})
+
+            def do_GET(self):
+                patient_id = self._patient_id()
+                if self.path == "/llu/connections":
+                    self._send({"status": 0, "data": [{"patientId": patient_id, "firstName": "Soak"}]})
+                elif self.path.endswith("/graph"):
+                    self._send({"status": 0, "data": server.graph(patient_id)})
+                elif self.path.endswith("/logbook"):
+                    self._send({"status": 0, "data": server.logbook(patient_id)})
+                else:
+                    self.send_error(404)
+
+        return Handler
+
+
+def growth(samples):
+    """Median of the last quarter relative to the first quarter (after warmup)"""
+    quarter = max(len(samples) // 4, 1)
+    return statistics.median(samples[:quarter]), statistics.median(samples[-quarter:])
+
+
+def check(label, latencies, rss):
+    """Compare late cycles with early ones, returning (passed, report lines)"""
+    warmup = int(len(latencies) * WARMUP_FRACTION)
+    early_latency, late_latency = growth(latencies[warmup:])
+    early_rss, late_rss = growth(rss[warmup:])
+    latency_ok = late_latency <= early_latency * (1 + LATENCY_GROWTH_TOLERANCE)
+    rss_ok = late_rss - early_rss <= RSS_GROWTH_LIMIT_MB
+    return latency_ok and rss_ok, [
+        f"{'✅' if latency_ok else '❌'} {label} per-poll latency: {early_latency:.2f} ms early, "
+        f"{late_latency:.2f} ms late (limit +{LATENCY_GROWTH_TOLERANCE:.0%})",
+        f"{'✅' if rss_ok else '❌'} {label} RSS: {early_rss:.1f} MB early, {late_rss:.1f} MB late "
+        f"(limit +{RSS_GROWTH_LIMIT_MB} MB)",
+    ]
+
+
+def soak_single_account(server, days, step_minutes, on_cycle):
+    """Drive the LibrelinkUP poller, with one outage and logbook backfill per simulated day"""
+    librelinkup = load_script("LibrelinkUP")
+    client = librelinkup.LibreViewAPI()
+    client.base_url = server.url
+    if not client.login("single@example.com", "password"):
+        raise RuntimeError("Login to the fake server failed")
+    patient_id = client.get_connections()[0]["patientId"]
+
+    cycles_per_day = 24 * 60 // step_minutes
+    latencies, rss, backfills = [], [], []
+    for cycle in range(days * cycles_per_day):
+        server.clock += timedelta(minutes=step_minutes)
+        poll_started = time.perf_counter()
+        client.get_glucose_data(patient_id)
+        latencies.append((time.perf_counter() - poll_started) * 1000)
+        rss.append(current_rss() / (1024 * 1024))
+
+        # Miss polls for longer than the graph window, then recover the way LibrelinkUP.main does
+        if (cycle + 1) % cycles_per_day == 0:
+            server.clock += timedelta(hours=OUTAGE_HOURS)
+            client.get_glucose_data(patient_id)
+            backfill_started = time.perf_counter()
+            client.backfill_gaps(patient_id)
+            backfills.append((time.perf_counter() - backfill_started) * 1000)
+        on_cycle()
+    return latencies, rss, backfills, client.stored_count
+
+
+def soak_cohort(server, patients, days, step_minutes, on_cycle):
+    """Drive CollectorWorker.poll_once over a cohort, compacting once per simulated day"""
+    interface = load_script("MultiPatientInterface")
+    patient_manager = interface.PatientManager()
+    # Name per-run CSVs from the simulated clock so compressed days do not overwrite each other's files
+    patient_manager.clock = lambda: server.clock
+    for i in range(patients):
+        patient_manager.add_patient(f"Soak Patient {i + 1}", f"soak{i + 1}@example.com", "password")
+
+    def api_factory():
+        api = interface.LibreViewAPI()
+        api.base_url = server.url
+        return api
+
+    worker = CollectorWorker(patient_manager, api_factory, LeaseStore(), "soak")
+    compactor = Compactor(min_file_age=0)
+    cycles_per_day = 24 * 60 // step_minutes
+    latencies, rss, peak_files = [], [], 0
+    for cycle in range(days * cycles_per_day):
+        server.clock += timedelta(minutes=step_minutes)
+        poll_started = time.perf_counter()
+        worker.poll_once()
+        latencies.append((time.perf_counter() - poll_started) * 1000 / patients)
+        rss.append(current_rss() / (1024 * 1024))
+        peak_files = max(peak_files, len(os.listdir(patient_manager.data_folder)))
+
+        # Compact once per simulated day, as the background job would
+        if (cycle + 1) % cycles_per_day == 0:
+            compactor.compact_once()
+        on_cycle()
+    return latencies, rss, peak_files
+
+
+def run_soak(patients=PATIENTS, days=DAYS, step_minutes=STEP_MINUTES, profile=False):
+    """Simulate days of single-account and cohort polling and return (passed, report lines)"""
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="libreview_soak_")
+    os.chdir(workdir)
+    server = FakeLibreViewServer()
+    server.start()
+    profiler = Profiler(os.path.join(workdir, "profiles"), interval=30) if profile else None
+    on_cycle = profiler.maybe_report if profiler else (lambda: None)
+
+    try:
+        if profiler:
+            profiler.start()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            started = time.monotonic()
+            single_latencies, single_rss, backfills, stored = soak_single_account(server, days, step_minutes,
+                                                                                  on_cycle)
+            single_elapsed = time.monotonic() - started
+
+            started = time.monotonic()
+            cohort_latencies, cohort_rss, peak_files = soak_cohort(server, patients, days, step_minutes, on_cycle)
+            cohort_elapsed = time.monotonic() - started
+    finally:
+        if profiler:
+            profiler.stop()
+        server.stop()
+        os.chdir(original_dir)
+
+    single_ok, single_report = check("LibrelinkUP", single_latencies, single_rss)
+    cohort_ok, cohort_report = check("Collector", cohort_latencies, cohort_rss)
+    report = [f"Simulated {days} day(s) of LibrelinkUP polling: {len(single_latencies)} polls, "
+              f"{len(backfills)} outage backfill(s), {stored} reading(s) stored in {single_elapsed:.1f}s"]
+    report += single_report
+    if backfills:
+        report.append(f"ℹ️ LibrelinkUP backfill after outage: {statistics.median(backfills):.2f} ms median, "
+                      f"{max(backfills):.2f} ms max")
+    report.append(f"Simulated {days} day(s) for {patients} patient(s): {len(cohort_latencies)} cycles, "
+                  f"up to {peak_files} file(s) in glucose_data/ in {cohort_elapsed:.1f}s")
+    report += cohort_report
+    report.append(f"📁 Working data in {workdir}")
+    if profiler:
+        report.append(f"🔬 Profiling reports in {profiler.folder}")
+    return single_ok and cohort_ok, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test LibrelinkUP and the collector against a local fake server")
+    parser.add_argument("--patients", type=int, default=PATIENTS)
+    parser.add_argument("--days", type=int, default=DAYS)
+    parser.add_argument("--step-minutes", type=int, default=STEP_MINUTES)
+    parser.add_argument("--profile", action="store_true", help="Write profiling reports during the run")
+    args = parser.parse_args(argv)
+
+    passed, report = run_soak(args.patients, args.days, args.step_minutes, args.profile)
+    for line in report:
+        print(line)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())